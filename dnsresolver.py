@@ -1,137 +1,514 @@
+import asyncio
+import atexit
+import ipaddress
+import logging
+import logging.handlers
+import queue
+import random
+import socket
+import struct
+import dns.asyncresolver
+import dns.exception
 import dns.message
-import dns.query
+import dns.name
 import dns.rdatatype
 import dns.resolver
 import dns.rcode  # For checking response codes
+import sys
+import threading
 import time
 
 # Use A records for consistency between iterative and recursive modes
 RECORD_TYPE = dns.rdatatype.A
 
+# All output goes through this logger. Records are handed to a queue and written to
+# stdout by a single listener thread, so concurrent lookups never block on stdout.
+# Per-record referral trace is logged at DEBUG, progress and results at INFO and
+# failures at WARNING.
+log = logging.getLogger("dnsres")
+log.setLevel(logging.INFO)
+log.propagate = False
+_log_queue = queue.SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _stdout_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+def flush_log():
+    """
+    Blocks until every queued log record has been written. Needed before a process exits
+    without running atexit handlers, such as a multiprocessing worker.
+    """
+    _log_listener.stop()
+    _log_listener.start()
+
 # Root DNS servers used to start the iterative resolution process
-ROOT_SERVERS = {
-    "198.41.0.4": "Root (a.root-servers.net)",
-    "199.9.14.201": "Root (b.root-servers.net)",
-    "192.33.4.12": "Root (c.root-servers.net)",
-    "199.7.91.13": "Root (d.root-servers.net)",
-    "192.203.230.10": "Root (e.root-servers.net)"
-}
+ROOT_SERVERS = (
+    "198.41.0.4",  # Root (a.root-servers.net)
+    "199.9.14.201",  # Root (b.root-servers.net)
+    "192.33.4.12",  # Root (c.root-servers.net)
+    "199.7.91.13",  # Root (d.root-servers.net)
+    "192.203.230.10",  # Root (e.root-servers.net)
+)
 
 TIMEOUT = 3  # Timeout in seconds for each DNS query attempt
+MAX_CACHE_TTL = 3600  # Upper bound in seconds on how long a cached answer is kept
+UDP_RECV_BUFFER = 1 << 20  # Receive buffer in bytes for the shared UDP socket
+RESOLVER_CACHE_SIZE = 1024  # Maximum number of answers kept in the system resolver's LRU cache
+WIRE_CACHE_SIZE = 1024  # Maximum number of pre-encoded query wires kept in _WIRE_CACHE
 
-def send_dns_query(server, domain):
-    """ 
-    Sends a DNS query to the given server for an A record of the specified domain.
-    Returns the response if successful, otherwise returns None.
+# RFC 6761 special-use TLDs that never exist in the global DNS
+SPECIAL_USE_TLDS = ("invalid", "test", "example")
+
+# Process-wide answer cache: (name, rdtype) -> (answer, expiry on the time.monotonic() clock).
+# The answer is a list of IP addresses, or None for a cached NXDOMAIN.
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+_MISS = object()  # Returned by cache_lookup when there is no fresh entry
+
+def cache_key(name, rdtype):
+    """Returns the normalized (name, rdtype) key used by the answer cache and in-flight map."""
+    return (name.rstrip('.').lower(), rdtype)
+
+def cache_lookup(name, rdtype):
     """
-    try:
+    Returns the cached answer for (name, rdtype) if it has not expired, otherwise _MISS.
+    A cached answer of None means the name is known not to exist.
+    """
+    key = cache_key(name, rdtype)
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is None:
+            return _MISS
+        answer, expiry = entry
+        if expiry <= time.monotonic():
+            del _CACHE[key]
+            return _MISS
+    return answer
+
+def cache_store(name, rdtype, answer, ttl):
+    """
+    Stores an answer (list of IPs, or None for NXDOMAIN) for at most MAX_CACHE_TTL seconds.
+    """
+    key = cache_key(name, rdtype)
+    expiry = time.monotonic() + min(ttl, MAX_CACHE_TTL)
+    with _CACHE_LOCK:
+        _CACHE[key] = (answer, expiry)
+
+def cache_discard(name, rdtype):
+    """Removes the cached entry for (name, rdtype), if any."""
+    with _CACHE_LOCK:
+        _CACHE.pop(cache_key(name, rdtype), None)
+
+def negative_ttl(response):
+    """
+    Returns how long an NXDOMAIN response may be cached, taken from the SOA record
+    in its authority section (RFC 2308), or None if the response carries no SOA.
+    """
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA:
+            return min(rrset.ttl, rrset[0].minimum)
+    return None
+
+# Pre-encoded A queries: domain -> wire bytes with a zero transaction ID.
+# The ID is stamped per send, so building a query is a dict lookup after the first time.
+_WIRE_CACHE = {}
+
+def query_wire(domain):
+    """
+    Returns the wire-format A query for domain, encoding it only on first use.
+    The first two bytes (transaction ID) are a placeholder to be replaced before sending.
+    """
+    wire = _WIRE_CACHE.get(domain)
+    if wire is None:
         query = dns.message.make_query(domain, RECORD_TYPE)
-        return dns.query.udp(query, server, timeout=TIMEOUT)
-    except Exception:
+        query.id = 0
+        wire = query.to_wire()
+        if len(_WIRE_CACHE) >= WIRE_CACHE_SIZE:
+            _WIRE_CACHE.clear()
+        _WIRE_CACHE[domain] = wire
+    return wire
+
+def local_answer(domain):
+    """
+    Answers names that must never be sent to the network. IP literals resolve to themselves,
+    localhost names to the loopback address, and other RFC 6761 special-use names
+    (.invalid, .test, .example) do not exist.
+    Returns a list of IPs, None for NXDOMAIN, or _MISS if the name needs a real lookup.
+    """
+    try:
+        return [str(ipaddress.ip_address(domain))]
+    except ValueError:
+        pass
+
+    tld = domain.rstrip('.').rpartition('.')[2].lower()
+    if tld == "localhost":
+        return ["127.0.0.1"]
+    if tld in SPECIAL_USE_TLDS:
         return None
+    return _MISS
+
+def log_stored_answer(domain, answer, source):
+    """Logs a result that did not come from the network (e.g. source="cached") like a live one."""
+    if answer is None:
+        log.info("[ERROR] NXDOMAIN: Domain '%s' does not exist (%s).", domain, source)
+        return
+    for ip in answer:
+        log.info("[SUCCESS] %s -> %s (%s)", domain, ip, source)
 
-def resolve_ns_name(ns_name):
+class UDPQueryProtocol(asyncio.DatagramProtocol):
+    """
+    Shares one long-lived UDP socket between all outstanding queries on an event loop.
+    Replies are matched to their query by (server IP, transaction ID).
+    """
+
+    def __init__(self):
+        self.transport = None
+        self.pending = {}  # (server, txid) -> (Future for the parsed reply, question bytes)
+
+    def connection_made(self, transport):
+        self.transport = transport
+        # Every outstanding query's reply lands on this one socket; the default buffer
+        # overflows (and silently drops replies) when hundreds arrive in a burst.
+        sock = transport.get_extra_info("socket")
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECV_BUFFER)
+        except OSError:
+            pass
+
+    def datagram_received(self, data, addr):
+        if len(data) < 2:
+            return
+        entry = self.pending.pop((addr[0], struct.unpack_from("!H", data)[0]), None)
+        if entry is None:
+            return
+        future, question = entry
+        if future.done():
+            return
+        # A reply that does not echo our question is treated like a failed query.
+        if data[12:12 + len(question)].lower() != question:
+            future.set_result(None)
+            return
+        try:
+            future.set_result(dns.message.from_wire(data))
+        except Exception:
+            future.set_result(None)
+
+    def error_received(self, exc):
+        # ICMP errors on a shared socket cannot be tied to a single query; it will time out.
+        pass
+
+    def connection_lost(self, exc):
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("UDP socket closed"))
+        self.pending.clear()
+
+    def submit(self, wire, server):
+        """
+        Sends a wire-format query (see query_wire) to server on the shared socket without
+        waiting for the reply; a fresh transaction ID is stamped into the first two bytes.
+        Returns a future that resolves to the parsed response, or to None if the reply
+        does not answer our question. Cancelling the future abandons the query.
+        """
+        txid = random.getrandbits(16)
+        # Two outstanding queries to the same server must not share a transaction ID.
+        while (server, txid) in self.pending:
+            txid = random.getrandbits(16)
+
+        key = (server, txid)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = (future, wire[12:].lower())
+
+        def forget(done_future):
+            entry = self.pending.get(key)
+            if entry is not None and entry[0] is done_future:
+                del self.pending[key]
+
+        future.add_done_callback(forget)
+        self.transport.sendto(struct.pack("!H", txid) + wire[2:], (server, 53))
+        return future
+
+_udp_endpoint = None  # (event loop, task creating the UDP endpoint on that loop)
+
+async def get_udp_protocol():
+    """
+    Returns the UDPQueryProtocol bound to the running event loop, creating its socket on first use.
+    """
+    global _udp_endpoint
+    loop = asyncio.get_running_loop()
+    if _udp_endpoint is None or _udp_endpoint[0] is not loop:
+        task = loop.create_task(loop.create_datagram_endpoint(UDPQueryProtocol, family=socket.AF_INET))
+        _udp_endpoint = (loop, task)
+    _, protocol = await asyncio.shield(_udp_endpoint[1])
+    return protocol
+
+def close_udp_socket():
+    """
+    Closes the shared UDP socket of the running event loop, if one was opened.
+    Call this before the loop shuts down (e.g. at the end of the coroutine given to asyncio.run).
+    """
+    global _udp_endpoint
+    if _udp_endpoint is None:
+        return
+    _, task = _udp_endpoint
+    _udp_endpoint = None
+    if task.done() and not task.cancelled() and task.exception() is None:
+        transport, _ = task.result()
+        transport.close()
+
+async def closing_udp_socket(coro):
+    """Awaits coro and then closes the shared UDP socket of the running event loop."""
+    try:
+        return await coro
+    finally:
+        close_udp_socket()
+
+_RESOLVER = None  # Long-lived system resolver shared by all recursive and fallback lookups
+
+def get_resolver():
+    """
+    Returns the shared dns.asyncresolver.Resolver, configuring it from the system on first use.
+    It keeps its own TTL-respecting LRU cache of upstream answers.
+    """
+    global _RESOLVER
+    if _RESOLVER is None:
+        resolver = dns.asyncresolver.Resolver()
+        resolver.cache = dns.resolver.LRUCache(max_size=RESOLVER_CACHE_SIZE)
+        resolver.timeout = TIMEOUT
+        resolver.lifetime = TIMEOUT * 2
+        _RESOLVER = resolver
+    return _RESOLVER
+
+async def resolve_ns_name(ns_name):
     """
     Fallback function to resolve an NS hostname to its A records using the system resolver.
     Returns a list of IP addresses if successful, otherwise returns an empty list.
+    Results are served from and stored in the answer cache.
     """
+    cached = cache_lookup(ns_name, dns.rdatatype.A)
+    if cached is not _MISS:
+        return cached or []
+
     try:
-        answer = dns.resolver.resolve(ns_name, "A")
+        answer = await get_resolver().resolve(ns_name, "A")
         ips = [rdata.address for rdata in answer]
-        print(f"Fallback: Resolved {ns_name} to {ips} using system resolver")
+        cache_store(ns_name, dns.rdatatype.A, ips, answer.rrset.ttl)
+        log.info("Fallback: Resolved %s to %s using system resolver", ns_name, ips)
         return ips
+    except dns.resolver.NXDOMAIN as e:
+        for response in e.responses().values():
+            ttl = negative_ttl(response)
+            if ttl is not None:
+                cache_store(ns_name, dns.rdatatype.A, None, ttl)
+                break
+        log.info("Fallback: Unable to resolve %s: %s", ns_name, e)
+        return []
     except Exception as e:
-        print(f"Fallback: Unable to resolve {ns_name}: {e}")
+        log.info("Fallback: Unable to resolve %s: %s", ns_name, e)
         return []
 
-def extract_next_nameservers(response):
+async def extract_next_nameservers(response, zone=None):
     """ 
     Extracts NS records from the authority section and tries to get their A records.
+    If zone is given, only the NS records owned by that zone are used.
     It first checks the additional section and then falls back to resolving the NS name.
-    Returns a list of IPs of the next authoritative nameservers.
+    Returns a list of unique IPs of the next authoritative nameservers.
     """
-    ns_ips = []
-    ns_names = []
-    
-    # Extract NS records from the authority section
-    for rrset in response.authority:
-        if rrset.rdtype == dns.rdatatype.NS:
-            for rr in rrset:
-                ns_name = rr.target.to_text().rstrip('.')  # Normalize by removing trailing dot
-                ns_names.append(ns_name)
-                print(f"Extracted NS hostname: {ns_name}")
-
-    # Extract A records from the additional section
+    # Glue A records from the additional section, keyed by owner name. dns.name.Name
+    # objects hash and compare case-insensitively, so no text normalization is needed.
     additional_a = {}
     for rrset in response.additional:
         if rrset.rdtype == dns.rdatatype.A:
-            name = rrset.name.to_text().rstrip('.')  # Normalize by removing trailing dot
-            a_records = [rr.address for rr in rrset]
-            additional_a[name] = a_records
-            print(f"Found A records for {name}: {a_records}")
-
-    # Resolve NS hostnames using the additional records or fallback if missing
-    for ns_name in ns_names:
-        normalized_ns = ns_name.rstrip('.')  # Ensure no trailing dot for comparison
-        if normalized_ns in additional_a:
-            ns_ips.extend(additional_a[normalized_ns])
-            print(f"Resolved {ns_name} to {additional_a[normalized_ns]}")
+            additional_a[rrset.name] = [rr.address for rr in rrset]
+            log.debug("Found A records for %s: %s", rrset.name, additional_a[rrset.name])
+
+    # Resolve NS hostnames from the authority section using the glue or fallback if missing
+    ns_ips = []
+    missing = []
+    for rrset in response.authority:
+        if rrset.rdtype != dns.rdatatype.NS or (zone is not None and rrset.name != zone):
+            continue
+        for rr in rrset:
+            glue_ips = additional_a.get(rr.target)
+            if glue_ips is not None:
+                ns_ips.extend(glue_ips)
+                log.debug("Resolved %s to %s", rr.target, glue_ips)
+                continue
+
+            # Glue missing from the additional section; resolve below
+            missing.append(rr.target.to_text().rstrip('.'))
+
+    # Fallback resolutions for all glueless NS names run concurrently
+    results = await asyncio.gather(*(resolve_ns_name(ns_name) for ns_name in missing))
+    for ns_name, fallback_ips in zip(missing, results):
+        if fallback_ips:
+            ns_ips.extend(fallback_ips)
+            log.info("Resolved %s using fallback to %s", ns_name, fallback_ips)
         else:
-            # Fallback resolution if A record not in additional section
-            fallback_ips = resolve_ns_name(ns_name)
-            if fallback_ips:
-                ns_ips.extend(fallback_ips)
-                print(f"Resolved {ns_name} using fallback to {fallback_ips}")
-            else:
-                print(f"Unable to resolve NS hostname: {ns_name}")
+            log.warning("Unable to resolve NS hostname: %s", ns_name)
 
-    return ns_ips
+    # Several NS names often share addresses; query each server only once
+    return list(dict.fromkeys(ns_ips))
 
-def iterative_dns_lookup(domain):
-    """ 
-    Performs an iterative DNS resolution starting from root servers.
-    It queries root servers, then TLD servers, then authoritative servers,
-    following the hierarchy until an answer is found or a definitive error (NXDOMAIN) is returned.
+async def query_fastest_server(servers, wire, stage):
+    """
+    Sends the query to all given servers at once and waits up to TIMEOUT for the first usable reply.
+    A reply is usable if its rcode is NOERROR or NXDOMAIN; slower queries are cancelled.
+    Returns a (server, response) tuple, or (None, None) if no server gave a usable reply.
     """
-    print(f"[Iterative DNS Lookup] Resolving {domain}")
+    try:
+        protocol = await get_udp_protocol()
+    except Exception as e:
+        log.warning("[ERROR] Unable to open UDP socket: %s", e)
+        return None, None
+
+    # Submit every query before waiting on any of them, so the whole batch of
+    # datagrams goes out in a single pass without scheduling a task per server.
+    futures = {protocol.submit(wire, ns_ip): ns_ip for ns_ip in servers}
+    pending = set(futures)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + TIMEOUT
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                ns_ip = futures[future]
+                response = None if future.exception() else future.result()
+                if response is None:
+                    log.warning("[ERROR] No response from %s server %s.", stage, ns_ip)
+                    continue
 
-    next_ns_list = list(ROOT_SERVERS.keys())
-    stage = "ROOT"
+                rcode = response.rcode()
+                if rcode in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+                    return ns_ip, response
+                log.warning("[ERROR] DNS query to %s returned error '%s'.", ns_ip, rcode.name)
 
-    while next_ns_list:
-        ns_ip = next_ns_list[0]
-        print(f"Querying {stage} server: {ns_ip}")
-        response = send_dns_query(ns_ip, domain)
-        
-        if response is None:
-            print(f"[ERROR] No response from {stage} server {ns_ip}, trying next server.")
-            next_ns_list = next_ns_list[1:]
+        for future in pending:
+            log.warning("[ERROR] No response from %s server %s.", stage, futures[future])
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return None, None
+
+# Iterative walks currently running: cache_key(domain, RECORD_TYPE) -> asyncio.Task.
+# Concurrent lookups of the same name await the running walk instead of starting another.
+_INFLIGHT = {}
+_FAILED = object()  # Returned by resolve_iteratively when no answer could be obtained
+
+def root_servers():
+    """Returns the root server IPs in a fresh random order, so the same root is not always first."""
+    servers = list(ROOT_SERVERS)
+    random.shuffle(servers)
+    return servers
+
+def closest_delegation(domain):
+    """
+    Finds the deepest zone enclosing domain whose nameserver IPs are still cached from an
+    earlier referral. Returns (zone, server IPs), or (None, None) if only the roots are known.
+    """
+    labels = domain.rstrip('.').split('.')
+    for i in range(len(labels)):
+        zone = '.'.join(labels[i:])
+        servers = cache_lookup(zone, dns.rdatatype.NS)
+        if servers is not _MISS and servers:
+            return zone, servers
+    return None, None
+
+def find_referral(response, domain_name, current_zone):
+    """
+    Returns the NS rrset of a referral from a server for current_zone, or None.
+    Only delegations strictly below current_zone that enclose domain_name are accepted
+    (a bailiwick check), so a server cannot redirect lookups for its own or a parent zone.
+    """
+    for rrset in response.authority:
+        if rrset.rdtype != dns.rdatatype.NS:
             continue
+        if rrset.name != current_zone and rrset.name.is_subdomain(current_zone) \
+                and domain_name.is_subdomain(rrset.name):
+            return rrset
+        log.warning("Ignoring out-of-bailiwick referral to %s from a server for zone %s", rrset.name, current_zone)
+    return None
+
+async def resolve_iteratively(domain, cache_answer=True):
+    """
+    Walks the hierarchy for domain, logging progress and caching the result. The walk starts
+    at the closest cached delegation, or at the root servers if there is none. Each referral
+    is cached under its zone cut for the NS TTL, so later lookups in that zone start there.
+    With cache_answer=False only the delegations are cached, not the answer or NXDOMAIN.
+    Returns the answer records as text, None for NXDOMAIN, or _FAILED if resolution failed.
+    """
+    # The same question is asked at every level, so encode the query only once.
+    try:
+        wire = query_wire(domain)
+        domain_name = dns.name.from_text(domain)
+    except dns.exception.DNSException as e:
+        log.warning("[ERROR] Invalid domain name '%s': %s", domain, e)
+        return _FAILED
+    cached_zone, next_ns_list = closest_delegation(domain)
+    if cached_zone is None:
+        next_ns_list = root_servers()
+        current_zone = dns.name.root
+        stage = "ROOT"
+    else:
+        current_zone = dns.name.from_text(cached_zone)
+        stage = "TLD" if '.' not in cached_zone.rstrip('.') else "AUTH"
+        log.info("Using cached nameservers for zone %s", cached_zone)
 
-        # Check for error responses
-        rcode = response.rcode()
-        if rcode != dns.rcode.NOERROR:
-            # If NXDOMAIN, it's a definitive answer that the domain does not exist.
-            if rcode == dns.rcode.NXDOMAIN:
-                print(f"[ERROR] NXDOMAIN: Domain '{domain}' does not exist (server {ns_ip}).")
-                return
-            else:
-                print(f"[ERROR] DNS query to {ns_ip} returned error '{dns.rcode.to_text(rcode)}'. Trying next server.")
-                next_ns_list = next_ns_list[1:]
+    while next_ns_list:
+        log.info("Querying %s servers: %s", stage, ", ".join(next_ns_list))
+        ns_ip, response = await query_fastest_server(next_ns_list, wire, stage)
+
+        if response is None:
+            log.warning("[ERROR] No usable response from any %s server.", stage)
+            if cached_zone is not None:
+                # The cached servers may have gone away; forget them and start over from the roots once.
+                log.info("Cached nameservers for zone %s failed; restarting from the root servers.", cached_zone)
+                cache_discard(cached_zone, dns.rdatatype.NS)
+                cached_zone = None
+                next_ns_list = root_servers()
+                current_zone = dns.name.root
+                stage = "ROOT"
                 continue
+            break
+
+        # If NXDOMAIN, it's a definitive answer that the domain does not exist.
+        if response.rcode() == dns.rcode.NXDOMAIN:
+            log.info("[ERROR] NXDOMAIN: Domain '%s' does not exist (server %s).", domain, ns_ip)
+            ttl = negative_ttl(response)
+            if ttl is not None and cache_answer:
+                cache_store(domain, RECORD_TYPE, None, ttl)
+            return None
 
-        # If an answer is present, print it and exit.
+        # If an answer is present, print it, cache the addresses and exit.
         if response.answer:
+            records = []
+            ips = []
             for rrset in response.answer:
                 for rr in rrset:
-                    print(f"[SUCCESS] {domain} -> {rr}")
-            return
+                    log.info("[SUCCESS] %s -> %s", domain, rr)
+                    records.append(rr.to_text())
+                if rrset.rdtype == RECORD_TYPE:
+                    ips.extend(rr.address for rr in rrset)
+            if ips and cache_answer:
+                cache_store(domain, RECORD_TYPE, ips, min(rrset.ttl for rrset in response.answer))
+            return records
         
-        # No final answer yet; extract next nameservers
-        next_ns_list = extract_next_nameservers(response)
+        # No final answer yet; follow the referral if it is below the zone we just queried
+        referral = find_referral(response, domain_name, current_zone)
+        next_ns_list = await extract_next_nameservers(response, referral.name) if referral else []
         if not next_ns_list:
-            print("[ERROR] No further nameservers found. Resolution failed.")
-            return
+            log.warning("[ERROR] No further nameservers found. Resolution failed.")
+            return _FAILED
+        cache_store(referral.name.to_text(), dns.rdatatype.NS, next_ns_list, referral.ttl)
+        current_zone = referral.name
 
         # Update the stage for informational purposes
         if stage == "ROOT":
@@ -140,30 +517,104 @@ def iterative_dns_lookup(domain):
             stage = "AUTH"
         # For stages beyond AUTH, we continue using the same label.
     
-    print("[ERROR] Resolution failed.")
+    log.warning("[ERROR] Resolution failed.")
+    return _FAILED
 
-def recursive_dns_lookup(domain):
+async def iterative_dns_lookup_async(domain):
+    """ 
+    Performs an iterative DNS resolution. It queries root servers, then TLD servers, then
+    authoritative servers, following the hierarchy until an answer is found or a definitive
+    error (NXDOMAIN) is returned. If an earlier referral for an enclosing zone is still cached,
+    the walk starts at that zone's nameservers instead of the roots.
+    All candidate servers at each level are queried in parallel and the first usable reply wins.
+    Answers and NXDOMAIN results are cached for their TTL, so repeated lookups skip the network;
+    IP literals and special-use names are answered locally (see local_answer), and concurrent
+    lookups of the same name share a single walk.
+    """
+    log.info("[Iterative DNS Lookup] Resolving %s", domain)
+
+    local = local_answer(domain)
+    if local is not _MISS:
+        log_stored_answer(domain, local, "local")
+        return
+
+    cached = cache_lookup(domain, RECORD_TYPE)
+    if cached is not _MISS:
+        log_stored_answer(domain, cached, "cached")
+        return
+
+    key = cache_key(domain, RECORD_TYPE)
+    task = _INFLIGHT.get(key)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        # Someone is already resolving this name; report their result once it arrives.
+        result = await asyncio.shield(task)
+        if result is _FAILED:
+            log.warning("[ERROR] Resolution of '%s' failed (shared).", domain)
+        else:
+            log_stored_answer(domain, result, "shared")
+        return
+
+    task = asyncio.create_task(resolve_iteratively(domain))
+    _INFLIGHT[key] = task
+
+    def forget(done_task):
+        if _INFLIGHT.get(key) is done_task:
+            del _INFLIGHT[key]
+
+    task.add_done_callback(forget)
+    # Shielded so that cancelling this caller does not abort the walk for other waiters.
+    await asyncio.shield(task)
+
+async def prewarm_delegations(domains):
+    """
+    Resolves the second-level domain of each distinct name once, so that the delegations
+    leading to it are cached and later lookups under it start at its authoritative servers.
+    Only delegations are cached; answers are left for the later lookups to fetch.
+    """
+    zones = {
+        '.'.join(domain.rstrip('.').split('.')[-2:]).lower()
+        for domain in domains
+        if local_answer(domain) is _MISS
+    }
+    await asyncio.gather(*(resolve_iteratively(zone, cache_answer=False) for zone in sorted(zones)))
+
+def iterative_dns_lookup(domain):
+    """Blocking wrapper around iterative_dns_lookup_async for callers without an event loop."""
+    asyncio.run(closing_udp_socket(iterative_dns_lookup_async(domain)))
+
+async def recursive_dns_lookup_async(domain):
     """ 
     Performs recursive DNS resolution using the system's default resolver.
     This approach relies on a recursive resolver (like Google DNS or a local ISP resolver)
-    to fetch the result recursively.
+    to fetch the result recursively. Repeated names are answered from the resolver's own
+    LRU cache (see get_resolver), not from the iterative answer cache, so the two modes stay
+    independent; IP literals and special-use names are answered locally (see local_answer).
     """
-    print(f"[Recursive DNS Lookup] Resolving {domain}")
+    log.info("[Recursive DNS Lookup] Resolving %s", domain)
+
+    local = local_answer(domain)
+    if local is not _MISS:
+        log_stored_answer(domain, local, "local")
+        return
+
     try:
-        answer = dns.resolver.resolve(domain, "A")
+        answer = await get_resolver().resolve(domain, "A")
         for rdata in answer:
-            print(f"[SUCCESS] {domain} -> {rdata}")
+            log.info("[SUCCESS] %s -> %s", domain, rdata)
     except dns.resolver.NXDOMAIN:
-        print(f"[ERROR] Domain '{domain}' does not exist.")
+        log.info("[ERROR] Domain '%s' does not exist.", domain)
     except dns.resolver.Timeout:
-        print("[ERROR] Query timed out.")
+        log.warning("[ERROR] Query timed out.")
     except dns.resolver.NoAnswer:
-        print(f"[ERROR] No answer found for '{domain}'.")
+        log.warning("[ERROR] No answer found for '%s'.", domain)
     except Exception as e:
-        print(f"[ERROR] Recursive lookup failed: {e}")
+        log.warning("[ERROR] Recursive lookup failed: %s", e)
+
+def recursive_dns_lookup(domain):
+    """Blocking wrapper around recursive_dns_lookup_async for callers without an event loop."""
+    asyncio.run(recursive_dns_lookup_async(domain))
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) != 3 or sys.argv[1] not in {"iterative", "recursive"}:
         print("Usage: python3 dnsresolver.py <iterative|recursive> <domain>")
         sys.exit(1)
@@ -177,4 +628,4 @@ if __name__ == "__main__":
     else:
         recursive_dns_lookup(domain)
     
-    print(f"Time taken: {time.time() - start_time:.3f} seconds")
+    log.info("Time taken: %.3f seconds", time.time() - start_time)